@@ -2,30 +2,18 @@
 import os
 import io
 import json
+import hashlib
+from concurrent.futures import as_completed
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
 
+import cv2
 import streamlit as st
 from PIL import Image, ImageDraw, ImageFont
 
-import spacy
-
-# ---------- Ensure SpaCy model is available ----------
-try:
-    nlp = spacy.load("en_core_web_sm")
-except OSError:
-    from spacy.cli import download
-    download("en_core_web_sm")
-    nlp = spacy.load("en_core_web_sm")
-
-from utils.ocr_utils import get_ocr_reader, pil_to_cv, cv_to_pil, ocr_with_boxes
-from utils.detect_utils import (
-    regex_entities,
-    align_text_findings_to_boxes,
-    detect_faces,
-    find_signature_regions,
-    detect_qr_regions,
-    ner_findings,
-)
+from utils.ocr_utils import get_ocr_reader, pil_to_cv, ocr_batch
+from utils.detect_utils import get_nlp, ner_findings_batch, ensure_face_model, ensure_qr_models
+from utils.parallel_utils import detect_page, make_page_pool
 from utils.redact_utils import apply_redactions_cv
 from utils.pdf_utils import load_pages_from_pdf, remove_pdf_metadata_bytes, export_images_to_pdf
 
@@ -48,6 +36,7 @@ with st.expander("Instructions"):
     - We redact by **Blur** or **Black box**, including **QR codes**, **faces**, **signatures**.
     - Extra PII: **SSN, NPI, Insurance IDs, ICD-10, Address heuristic**.
     - Optional: **spaCy NER** to catch names/addresses/orgs.
+    - First run downloads OpenCV's **DNN face detector** weights into `models/` (hash-checked; see `models/README.md`); without them, faces use the Haar cascade.
     """)
 
 # ---------- Options ----------
@@ -71,6 +60,15 @@ with colG:
 with colH:
     use_easyocr = st.checkbox("Use EasyOCR", value=True)
 
+colI, colJ = st.columns([3, 1])
+OCR_LANG_OPTIONS = ["en", "hi", "fr", "de", "es"]
+with colI:
+    ocr_langs = st.multiselect("OCR languages (EasyOCR)", OCR_LANG_OPTIONS, default=["en"],
+                               help="Each extra language makes the OCR model larger and slower.")
+with colJ:
+    onnx_int8 = st.checkbox("⚡ Int8 ONNX recognizer (CPU)", value=False,
+                            help="Needs onnxruntime; the first run exports and quantizes the model.")
+
 uploads = st.file_uploader(
     "Upload files (images, pdf, docx, xlsx). You can select multiple.",
     accept_multiple_files=True,
@@ -90,8 +88,45 @@ def timestamp():
 
 # ---------- Helpers ----------
 @st.cache_resource
-def _get_reader(use_easyocr: bool):
-    return get_ocr_reader(use_easyocr)
+def _get_reader(use_easyocr: bool, langs: tuple, onnx_int8: bool):
+    return get_ocr_reader(use_easyocr, langs, onnx_int8)
+
+@st.cache_resource
+def _get_nlp(enable_ner: bool):
+    return get_nlp(enable_ner)
+
+@st.cache_resource
+def _ensure_face_model():
+    # once per server process, before any worker needs it; workers never download
+    return ensure_face_model()
+
+@st.cache_resource
+def _ensure_qr_models():
+    return ensure_qr_models()
+
+@st.cache_resource
+def _get_page_pool():
+    return make_page_pool()
+
+def _reset_page_pool():
+    """Drop a pool left broken by a crashed worker so the next call builds a fresh one."""
+    _get_page_pool().shutdown(wait=False, cancel_futures=True)
+    _get_page_pool.clear()
+
+# Heavy intermediates are cached by content (Streamlit hashes bytes/str args by value),
+# so re-running the same file skips rasterisation and OCR.
+@st.cache_data(max_entries=16, show_spinner=False)
+def _cached_pdf_pages(raw: bytes):
+    clean = remove_pdf_metadata_bytes(raw)
+    try:
+        return load_pages_from_pdf(clean, executor=_get_page_pool())
+    except BrokenProcessPool:
+        _reset_page_pool()
+        return load_pages_from_pdf(clean)
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def _cached_ocr(page_hashes: tuple, use_easyocr: bool, langs: tuple, onnx_int8: bool, _pils, _reader):
+    return ocr_batch(_pils, _reader)
 
 def _prep_pil_image(file_obj):
     pil = Image.open(file_obj).convert("RGB")
@@ -102,22 +137,34 @@ def _prep_pil_image(file_obj):
         pil = pil.resize((int(w * s), int(h * s)), Image.LANCZOS)
     return pil
 
-def process_one_pil(pil, name, reader, progress_cb, page_tag=""):
-    cv_img = pil_to_cv(pil)
-    lines = ocr_with_boxes(pil, reader)
-    full_text = "\n".join([l["text"] for l in lines])
-
-    text_findings = regex_entities(full_text)
-    text_boxes = align_text_findings_to_boxes(text_findings, lines)
-
-    ner_boxes = ner_findings(full_text, lines, enable_ner)
-
-    face_boxes = detect_faces(cv_img) if enable_faces else []
-    sig_boxes = find_signature_regions(cv_img, lines) if enable_signatures else []
-    qr_boxes = detect_qr_regions(cv_img)  # ✅ QR detection included always
-
-    merged = text_boxes + ner_boxes + face_boxes + sig_boxes + qr_boxes
-
+@st.cache_resource
+def _get_font(size: int):
+    try:
+        return ImageFont.truetype("DejaVuSans.ttf", size)
+    except:
+        return ImageFont.load_default()
+
+def _render_text_page(text_lines, font, line_step, max_chars, max_y):
+    """
+    Draw text lines onto a blank A4-sized page. Returns (PIL, lines) where lines
+    are the OCR-style {"text","box","conf"} entries for what was drawn, so the
+    page does not need to go through OCR.
+    """
+    img = Image.new("RGB", (1654, 2339), "white")
+    draw = ImageDraw.Draw(img)
+    max_lines = (max_y - 40) // line_step + 1
+    shown = [line[:max_chars] for line in text_lines[:max_lines]]
+    # multiline_text advances by the height of "A" plus spacing; pick spacing to keep line_step
+    spacing = line_step - draw.textbbox((0, 0), "A", font=font)[3]
+    draw.multiline_text((40, 40), "\n".join(shown), fill="black", font=font, spacing=spacing)
+    lines = []
+    for i, line in enumerate(shown):
+        if line.strip():
+            text_w = min(int(draw.textlength(line, font=font)), img.width - 40)
+            lines.append({"text": line, "box": [40, 40 + i * line_step, text_w, line_step], "conf": 1.0})
+    return img, lines
+
+def process_one_page(cv_img, name, merged, page_tag=""):
     if auto_redact:
         selected_boxes = merged
     else:
@@ -147,19 +194,17 @@ def process_one_pil(pil, name, reader, progress_cb, page_tag=""):
 
     # ✅ High-speed preview mode
     if preview_mode:
-        preview_img = pil.copy()
-        draw = ImageDraw.Draw(preview_img)
+        preview_img = cv_img.copy()
         for det in selected_boxes:
             x, y, w, h = det.get("box", [0, 0, 0, 0])
-            draw.rectangle([x, y, x + w, y + h], outline="red", width=3)
-        st.image(preview_img, caption=f"Preview (fast mode) {page_tag}".strip(), use_container_width=True)
-        redacted_pil = pil  # store original for later export
+            cv2.rectangle(preview_img, (x, y), (x + w, y + h), (0, 0, 255), 3)
+        st.image(preview_img, channels="BGR", caption=f"Preview (fast mode) {page_tag}".strip(), use_container_width=True)
+        redacted_img = cv_img  # store original for later export
     else:
-        redacted_pil = apply_redactions_cv(cv_img, selected_boxes, mode=redact_method)
-        st.image(redacted_pil, caption=f"Redacted preview {page_tag}".strip(), use_container_width=True)
+        redacted_img = apply_redactions_cv(cv_img, selected_boxes, mode=redact_method)
+        st.image(redacted_img, channels="BGR", caption=f"Redacted preview {page_tag}".strip(), use_container_width=True)
 
-    progress_cb()
-    return redacted_pil, {
+    return redacted_img, {
         "file": name,
         "detections": merged,
         "redacted": selected_boxes,
@@ -170,67 +215,41 @@ def process_one_pil(pil, name, reader, progress_cb, page_tag=""):
 
 # ---------- Main ----------
 if process and uploads:
-    reader = _get_reader(use_easyocr)
-
-    total_units = 0
-    for f in uploads:
-        ext = os.path.splitext(f.name)[1].lower()
-        if ext == ".pdf":
-            raw = f.read(); f.seek(0)
-            try:
-                pages = load_pages_from_pdf(remove_pdf_metadata_bytes(raw))
-                total_units += len(pages)
-            except Exception:
-                total_units += 1
-        else:
-            total_units += 1
-
-    st.session_state.done_units = 0
-    prog = st.progress(0.0)
-
-    def progress_cb():
-        st.session_state.done_units += 1
-        prog.progress(min(1.0, st.session_state.done_units / max(1, total_units)))
-
-    all_logs = []
-    redacted_images_global = []
-
+    ocr_langs = tuple(sorted(ocr_langs, key=OCR_LANG_OPTIONS.index)) or ("en",)
+    try:
+        reader = _get_reader(use_easyocr, ocr_langs, onnx_int8)
+    except ValueError as e:
+        st.error(f"Unsupported OCR language combination: {e}")
+        st.stop()
+    _get_nlp(enable_ner)  # warm the NER model once per process
+    if enable_faces:
+        _ensure_face_model()
+    _ensure_qr_models()
+
+    # Pass 1: enumerate every page of every upload
+    units = []
     for file in uploads:
-        st.markdown(f"### 📄 Processing {file.name}")
         name = file.name
         ext = os.path.splitext(name)[1].lower()
 
         if ext in [".png", ".jpg", ".jpeg"]:
-            pil = _prep_pil_image(file)
-            red_pil, log = process_one_pil(pil, name, reader, progress_cb)
-            redacted_images_global.append(red_pil); all_logs.append(log)
+            units.append({"file": name, "name": name, "pil": _prep_pil_image(file), "page_tag": "", "lines": None})
 
         elif ext == ".pdf":
             raw = file.read(); file.seek(0)
-            stripped = remove_pdf_metadata_bytes(raw)
-            pages = load_pages_from_pdf(stripped)
+            try:
+                pages = _cached_pdf_pages(raw)
+            except Exception:
+                st.warning(f"Could not read PDF: {name}")
+                continue
             for pno, pil in enumerate(pages, start=1):
-                red_pil, log = process_one_pil(pil, name, reader, progress_cb, page_tag=f"(p{pno})")
-                redacted_images_global.append(red_pil); all_logs.append(log)
+                units.append({"file": name, "name": name, "pil": pil, "page_tag": f"(p{pno})", "lines": None})
 
         elif ext == ".docx":
             from utils.doc_utils import extract_text_from_docx_stream
             text = extract_text_from_docx_stream(file)
-            img = Image.new("RGB", (1654, 2339), "white")
-            draw = ImageDraw.Draw(img)
-            try:
-                font = ImageFont.truetype("DejaVuSans.ttf", 18)
-            except:
-                font = ImageFont.load_default()
-            y = 40
-            for line in text.splitlines():
-                draw.text((40, y), line[:1800], fill="black", font=font)
-                y += 24
-                if y > 2300:
-                    break
-            pil = img
-            red_pil, log = process_one_pil(pil, name, reader, progress_cb)
-            redacted_images_global.append(red_pil); all_logs.append(log)
+            img, lines = _render_text_page(text.splitlines(), _get_font(18), line_step=24, max_chars=1800, max_y=2300)
+            units.append({"file": name, "name": name, "pil": img, "page_tag": "", "lines": lines})
 
         elif ext == ".xlsx":
             import openpyxl
@@ -238,38 +257,89 @@ if process and uploads:
             for sheet in wb.sheetnames:
                 ws = wb[sheet]
                 rows = [[("" if c is None else str(c)) for c in r] for r in ws.iter_rows(values_only=True)]
-                img = Image.new("RGB", (1654, 2339), "white")
-                draw = ImageDraw.Draw(img)
-                try:
-                    font = ImageFont.truetype("DejaVuSans.ttf", 16)
-                except:
-                    font = ImageFont.load_default()
-                y = 40
-                for r in rows:
-                    line = " | ".join(r)
-                    draw.text((40, y), line[:2000], fill="black", font=font)
-                    y += 22
-                    if y > 2280:
-                        break
-                red_pil, log = process_one_pil(img, f"{name} [{sheet}]", reader, progress_cb)
-                redacted_images_global.append(red_pil); all_logs.append(log)
+                img, lines = _render_text_page([" | ".join(r) for r in rows], _get_font(16), line_step=22, max_chars=2000, max_y=2280)
+                units.append({"file": name, "name": f"{name} [{sheet}]", "pil": img, "page_tag": "", "lines": lines})
 
         else:
             st.warning(f"Unsupported file type: {ext}")
+
+    total_units = len(units)
+    st.session_state.done_units = 0
+    prog = st.progress(0.0)
+
+    def progress_cb():
+        st.session_state.done_units += 1
+        prog.progress(min(1.0, st.session_state.done_units / max(1, total_units)))
+
+    # Pass 2: batched OCR over scanned pages (rendered DOCX/XLSX text is already known)
+    # (one cached batch per file, keyed by the page pixels)
+    to_ocr = {}
+    for u in units:
+        if u["lines"] is None:
+            to_ocr.setdefault(u["file"], []).append(u)
+    if to_ocr:
+        with st.spinner("Running OCR..."):
+            for file_units in to_ocr.values():
+                pils = [u["pil"] for u in file_units]
+                page_hashes = tuple(hashlib.sha256(p.tobytes()).hexdigest() for p in pils)
+                for u, lines in zip(file_units, _cached_ocr(page_hashes, use_easyocr, ocr_langs, onnx_int8, pils, reader)):
+                    u["lines"] = lines
+
+    # Pass 3: per-page detection (parallel across pages for multi-page jobs);
+    # NER runs batched over all pages here while the workers handle the rest
+    for u in units:
+        u["cv"] = pil_to_cv(u.pop("pil"))  # pages stay as BGR arrays from here to export
+    flags = (False, enable_faces, enable_signatures)
+    page_texts = ["\n".join([l["text"] for l in u["lines"]]) for u in units]
+    ner_boxes = None
+    if len(units) > 1:
+        try:
+            pool = _get_page_pool()
+            futures = {pool.submit(detect_page, u["cv"], u["lines"], *flags): u for u in units}
+            ner_boxes = ner_findings_batch(page_texts, [u["lines"] for u in units], enable_ner)
+            for fut in as_completed(futures):
+                futures[fut]["detections"] = fut.result()
+                progress_cb()
+        except BrokenProcessPool:
+            # a worker died; start a fresh pool next run and finish the remaining pages here
+            st.warning("A detection worker crashed; finishing the remaining pages in this process.")
+            _reset_page_pool()
+    if ner_boxes is None:
+        ner_boxes = ner_findings_batch(page_texts, [u["lines"] for u in units], enable_ner)
+    for u in units:
+        if "detections" not in u:
+            u["detections"] = detect_page(u["cv"], u["lines"], *flags)
             progress_cb()
+    for u, boxes in zip(units, ner_boxes):
+        u["detections"] += boxes
+
+    # Pass 4: review & redaction
+    all_logs = []
+    redacted_images_global = []
+    current_file = None
+    for u in units:
+        if u["file"] != current_file:
+            current_file = u["file"]
+            st.markdown(f"### 📄 Processing {current_file}")
+        red_img, log = process_one_page(u.pop("cv"), u["name"], u["detections"], page_tag=u["page_tag"])
+        redacted_images_global.append(red_img); all_logs.append(log)
 
     if redacted_images_global:
         # ✅ If preview mode, now apply real redaction for export
+        # (generator, so each redacted copy is dropped once its page is written)
         if preview_mode:
-            real_redacted_images = []
-            for log, pil in zip(all_logs, redacted_images_global):
-                cv_img = pil_to_cv(pil)
-                red_pil = apply_redactions_cv(cv_img, log["redacted"], mode=redact_method)
-                real_redacted_images.append(red_pil)
+            real_redacted_images = (
+                apply_redactions_cv(cv_img, log["redacted"], mode=redact_method)
+                for log, cv_img in zip(all_logs, redacted_images_global)
+            )
         else:
             real_redacted_images = redacted_images_global
 
-        pdf_bytes = export_images_to_pdf(real_redacted_images).getvalue()
+        try:
+            pdf_bytes = export_images_to_pdf(real_redacted_images).getvalue()
+        except RuntimeError as e:
+            st.error(f"Export failed, no files were written: {e}")
+            st.stop()
         ts = timestamp()
         pdf_name = f"redacted_{ts}.pdf"
         log_name = f"redaction_log_{ts}.json"
@@ -0,0 +1,40 @@
+from utils.detect_utils import regex_entities, locate_findings_by_offset
+
+
+def _page(*texts):
+    lines = [{"text": t, "box": [10, 10 + 30 * i, 100, 20]} for i, t in enumerate(texts)]
+    return "\n".join(texts), lines
+
+
+def _boxes_for(label, *texts):
+    text, lines = _page(*texts)
+    boxes = locate_findings_by_offset(regex_entities(text), lines)
+    return lines, [b for b in boxes if b["label"] == label]
+
+
+def test_phone_split_across_ocr_lines_boxes_both_lines():
+    lines, phone = _boxes_for("PHONE", "Tel: +1 555 123", "4567")
+    assert [(b["box"], b["matched"]) for b in phone] == [(lines[0]["box"], "+1 555 123"), (lines[1]["box"], "4567")]
+
+
+def test_card_split_across_ocr_lines_boxes_both_lines():
+    lines, card = _boxes_for("CREDIT_CARD", "Card 4111 1111", "1111 1111")
+    assert [b["box"] for b in card] == [lines[0]["box"], lines[1]["box"]]
+
+
+def test_phone_with_non_breaking_spaces():
+    assert [f["label"] for f in regex_entities("555\xa0123\xa04567")] == ["PHONE"]
+
+
+def test_card_number_is_not_logged_as_aadhaar():
+    labels = {f["matched"]: f["label"] for f in regex_entities("Card 4111 1111 1111 1111\nAadhaar 1234 5678 9012")}
+    assert labels["4111 1111 1111 1111"] == "CREDIT_CARD"
+    assert labels["1234 5678 9012"] == "AADHAAR"
+
+
+def test_span_across_line_break_boxes_each_line():
+    text, lines = _page("Patient Barack", "Obama visited")
+    start = text.index("Barack")
+    finding = {"label": "PERSON", "span": [start, start + len("Barack\nObama")], "matched": "Barack\nObama"}
+    boxes = locate_findings_by_offset([finding], lines)
+    assert [(b["box"], b["matched"]) for b in boxes] == [(lines[0]["box"], "Barack"), (lines[1]["box"], "Obama")]
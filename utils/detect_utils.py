@@ -1,10 +1,16 @@
 #detect_utils.py
+import os
 import re
+import hashlib
+import tempfile
+import urllib.request
 import cv2
 import numpy as np
 from pyzbar.pyzbar import decode
 
 # ---------- Optional spaCy NER (names, addresses, orgs) ----------
+# Only the "ner" pipe is used; skip loading the rest of the pipeline.
+NLP_UNUSED_PIPES = ["tagger", "parser", "lemmatizer", "attribute_ruler"]
 _NLP = None
 def get_nlp(enable_ner: bool):
     """Lazily load spaCy model if enabled; return None if disabled or load fails."""
@@ -16,11 +22,11 @@ def get_nlp(enable_ner: bool):
     try:
         import spacy
         try:
-            _NLP = spacy.load("en_core_web_sm")
+            _NLP = spacy.load("en_core_web_sm", exclude=NLP_UNUSED_PIPES)
         except OSError:
             from spacy.cli import download
             download("en_core_web_sm")
-            _NLP = spacy.load("en_core_web_sm")
+            _NLP = spacy.load("en_core_web_sm", exclude=NLP_UNUSED_PIPES)
         return _NLP
     except Exception:
         return None
@@ -30,6 +36,7 @@ def get_nlp(enable_ner: bool):
 PATTERNS = {
     "EMAIL": re.compile(r"\b[a-zA-Z0-9._%+\-]+@[a-zA-Z0-9.\-]+\.[A-Za-z]{2,}\b"),
     "PHONE": re.compile(r"(?<!\d)(?:\+?\d{1,3}[-\s]?)?(?:\(?\d{3}\)?[-\s]?){1}\d{3}[-\s]?\d{4}(?!\d)"),
+    "CREDIT_CARD": re.compile(r"(?:(?:\d{4}[-\s]?){3}\d{4})"),
     "AADHAAR": re.compile(r"(?<!\d)(?:\d{4}[-\s]?\d{4}[-\s]?\d{4})(?!\d)"),
     "PAN": re.compile(r"\b[A-Z]{5}[0-9]{4}[A-Z]\b"),
     "GSTIN": re.compile(r"\b[0-9]{2}[A-Z]{5}[0-9]{4}[A-Z][1-9A-Z]Z[0-9A-Z]\b"),
@@ -38,7 +45,6 @@ PATTERNS = {
     "NPI": re.compile(r"\b\d{10}\b"),
     "PASSPORT": re.compile(r"\b[A-PR-WYa-pr-wy][0-9]{7,8}\b"),
     "DL_GENERIC": re.compile(r"\b[A-Z0-9]{6,15}\b"),
-    "CREDIT_CARD": re.compile(r"(?:(?:\d{4}[- ]?){3}\d{4})"),
     "CVV": re.compile(r"(?<!\d)\d{3}(?!\d)"),
     "BANK_ACC": re.compile(r"(?<!\d)\d{9,18}(?!\d)"),
     "DOB": re.compile(r"\b(?:DOB|Date of Birth|Birth Date)\s*[:\-]?\s*(?:\d{1,2}[/\-]\d{1,2}[/\-](?:19|20)\d{2}|[A-Za-z]{3,9}\s+\d{1,2},\s+(?:19|20)\d{2})\b", re.I),
@@ -49,6 +55,16 @@ PATTERNS = {
     "INSURANCE_ID": re.compile(r"\b(?:Member\s*ID|Policy\s*No\.?|Subscriber\s*ID|Payer\s*ID|Group\s*No\.?)\s*[:\-]?\s*[A-Z0-9\-]{5,20}\b", re.I),
 }
 
+# All patterns as one named-group alternation so the text is scanned once.
+# Case-insensitive patterns keep their flag via a scoped (?i:...) group.
+# The first alternative to match wins, so order matters (CREDIT_CARD before
+# AADHAAR). Separators may span a line break; locate_findings_by_offset boxes
+# every OCR line such a match covers.
+COMBINED_PATTERN = re.compile("|".join(
+    f"(?P<{label}>(?i:{pat.pattern}))" if pat.flags & re.I else f"(?P<{label}>{pat.pattern})"
+    for label, pat in PATTERNS.items()
+))
+
 SIGNATURE_HINTS = ["signature", "sign", "signee"]
 ADDRESS_HINT_WORDS = [
     "address", "addr.", "street", "st.", "road", "rd.", "lane", "ln.",
@@ -57,43 +73,168 @@ ADDRESS_HINT_WORDS = [
 
 
 # ---------- Regex findings ----------
+ADDRESS_LINE_PATTERN = re.compile(r"\d{1,5}\s+[A-Za-z0-9.\- ]+,\s*[A-Za-z.\- ]+[, ]+\w{2}\s+\d{4,6}")
+
 def regex_entities(text: str):
     findings = []
-    for label, pat in PATTERNS.items():
-        for m in pat.finditer(text):
-            findings.append({"label": label, "span": [m.start(), m.end()], "matched": m.group(0)})
-    for line in text.splitlines():
+    for m in COMBINED_PATTERN.finditer(text):
+        findings.append({"label": m.lastgroup, "span": [m.start(), m.end()], "matched": m.group(0)})
+    offset = 0
+    for line in text.split("\n"):
         low = line.lower()
-        if any(k in low for k in ADDRESS_HINT_WORDS) or re.search(r"\d{1,5}\s+[A-Za-z0-9.\- ]+,\s*[A-Za-z.\- ]+[, ]+\w{2}\s+\d{4,6}", line):
+        if any(k in low for k in ADDRESS_HINT_WORDS) or ADDRESS_LINE_PATTERN.search(line):
             if len(line.strip()) > 6:
-                findings.append({"label": "ADDRESS", "span": [0, 0], "matched": line.strip()[:200]})
+                findings.append({"label": "ADDRESS", "span": [offset, offset + len(line)], "matched": line.strip()[:200]})
+        offset += len(line) + 1
     return findings
 
 
+def line_offsets(ocr_lines):
+    """Start offset of each OCR line within "\\n".join(line texts)."""
+    lengths = np.fromiter((len(l["text"]) + 1 for l in ocr_lines), dtype=np.int64, count=len(ocr_lines))
+    return np.cumsum(lengths) - lengths
+
+def locate_findings_by_offset(text_findings, ocr_lines):
+    """
+    Map findings to OCR line boxes from their spans in the joined page text
+    ("\\n".join of the line texts) with searchsorted. A span that crosses line
+    breaks gets one box per line it covers, each carrying that line's part of
+    the match. Findings without a usable span fall back to align_text_findings_to_boxes.
+    """
+    if not text_findings or not ocr_lines:
+        return align_text_findings_to_boxes(text_findings, ocr_lines)
+    joined = "\n".join(l["text"] for l in ocr_lines)
+    starts = line_offsets(ocr_lines)
+    ends = starts + np.fromiter((len(l["text"]) for l in ocr_lines), dtype=np.int64, count=len(ocr_lines))
+    spans = np.array([tf.get("span") or [0, 0] for tf in text_findings], dtype=np.int64).reshape(-1, 2)
+    first = np.searchsorted(starts, spans[:, 0], side="right") - 1
+    last = np.searchsorted(starts, spans[:, 1] - 1, side="right") - 1
+    ok = (spans[:, 1] > spans[:, 0]) & (spans[:, 0] >= 0) & (spans[:, 1] <= len(joined))
+
+    boxes = []
+    pending = []
+    for tf, (s, e), i0, i1, hit in zip(text_findings, spans.tolist(), first.tolist(), last.tolist(), ok.tolist()):
+        if not (hit and tf["matched"] in joined[s:e]):
+            pending.append(tf)
+            continue
+        for i in range(i0, i1 + 1):
+            a, b = max(s, int(starts[i])), min(e, int(ends[i]))
+            if a < b:  # skip a line the span only touches via its trailing "\n"
+                part = tf["matched"] if i0 == i1 else joined[a:b]
+                boxes.append({"label": tf["label"], "box": ocr_lines[i]["box"], "matched": part})
+    if pending:
+        boxes.extend(align_text_findings_to_boxes(pending, ocr_lines))
+    return boxes
+
+
+_NON_WORD = re.compile(r"\W+")
+_NON_WORD_KEEP_NL = re.compile(r"[^\w\n]+")
+
 def align_text_findings_to_boxes(text_findings, ocr_lines):
+    # Index the page once: raw and normalised line texts each joined with "\n",
+    # with per-line start offsets. Resolving a target is then one str.find over
+    # the page plus a searchsorted, instead of a Python loop over every line.
+    # A target without "\n" can't match across a line break, so the first hit
+    # is in the first line containing it, as before.
+    raw = "\n".join(l["text"] for l in ocr_lines)
+    raw_starts = line_offsets(ocr_lines)
+    cleaned = _NON_WORD_KEEP_NL.sub("", raw.lower())  # whole page in one pass; "\n" kept as the separator
+    cleaned_lengths = np.fromiter((len(t) + 1 for t in cleaned.split("\n")), dtype=np.int64, count=len(ocr_lines))
+    cleaned_starts = np.cumsum(cleaned_lengths) - cleaned_lengths
+
+    placed_box = {}
     boxes = []
     for tf in text_findings:
         target = tf["matched"]
-        placed = False
-        for line in ocr_lines:
-            if target and target in line["text"]:
-                boxes.append({"label": tf["label"], "box": line["box"], "matched": target})
-                placed = True
-                break
-        if not placed:
-            t_clean = re.sub(r"\W+", "", target.lower())
-            for line in ocr_lines:
-                l_clean = re.sub(r"\W+", "", line["text"].lower())
-                if t_clean and t_clean in l_clean and len(t_clean) >= 4:
-                    boxes.append({"label": tf["label"], "box": line["box"], "matched": target})
-                    placed = True
-                    break
-        if not placed:
-            boxes.append({"label": tf["label"], "box": [0, 0, 0, 0], "matched": target})
+        if target not in placed_box:
+            idx = None
+            pos = raw.find(target) if target and "\n" not in target else -1
+            if pos >= 0:
+                idx = int(np.searchsorted(raw_starts, pos, side="right")) - 1
+            else:
+                t_clean = _NON_WORD.sub("", target.lower())
+                pos = cleaned.find(t_clean) if len(t_clean) >= 4 else -1
+                if pos >= 0:
+                    idx = int(np.searchsorted(cleaned_starts, pos, side="right")) - 1
+            placed_box[target] = ocr_lines[idx]["box"] if idx is not None else [0, 0, 0, 0]
+        boxes.append({"label": tf["label"], "box": placed_box[target], "matched": target})
     return boxes
 
 
+# ---------- Shared downscaled view ----------
+def prepare_views(cv_img, max_side=1200):
+    """
+    Grayscale view of a BGR page, downscaled so its longest side is <= max_side.
+    Returns (gray_small, scale) where scale maps full-res coords to the view.
+    Face/signature/QR detection all share this view instead of each converting
+    the full-resolution page.
+    """
+    h, w = cv_img.shape[:2]
+    scale = min(1.0, max_side / max(h, w))
+    gray = cv2.cvtColor(cv_img, cv2.COLOR_BGR2GRAY)
+    if scale < 1.0:
+        gray = cv2.resize(gray, (max(1, int(w * scale)), max(1, int(h * scale))), interpolation=cv2.INTER_AREA)
+    return gray, scale
+
+def _to_full_res(x, y, w, h, scale):
+    return [max(0, int(x / scale)), max(0, int(y / scale)), int(w / scale), int(h / scale)]
+
+
+# ---------- Model files ----------
+# Weights are fetched once from pinned upstream URLs and checked against the
+# hashes upstream publishes; see models/README.md for manual/offline setup.
+MODELS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "models")
+
+def _file_digest(path, algo):
+    with open(path, "rb") as f:
+        return hashlib.new(algo, f.read()).hexdigest()
+
+def _fetch_model(url, path, digest, algo, timeout=30):
+    """
+    Make sure `path` holds the file with the given digest, downloading it from
+    `url` if it is missing or doesn't match. The download goes to a temp file
+    next to `path` and is only moved into place once its hash checks out.
+    Returns True if a verified file is in place.
+    """
+    try:
+        if os.path.exists(path) and _file_digest(path, algo) == digest:
+            return True
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+    except OSError:
+        return False
+    try:
+        with os.fdopen(fd, "wb") as f, urllib.request.urlopen(url, timeout=timeout) as resp:
+            data = resp.read()
+            f.write(data)
+        if hashlib.new(algo, data).hexdigest() != digest:
+            return False
+        os.replace(tmp, path)
+        return True
+    except OSError:
+        return False
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
 # ---------- Face detection ----------
+# OpenCV's 8-bit quantized SSD face detector (res10, TensorFlow graph) runs via
+# cv2.dnn when its weights are present; otherwise we fall back to the Haar cascade
+# bundled with OpenCV. The text graph is vendored in models/; the weights come
+# from OpenCV's dated release and are pinned to the SHA-1 OpenCV publishes for
+# them (samples/dnn/face_detector/weights.meta4).
+FACE_MODEL_PATH = os.path.join(MODELS_DIR, "opencv_face_detector_uint8.pb")
+FACE_CONFIG_PATH = os.path.join(MODELS_DIR, "opencv_face_detector.pbtxt")
+FACE_MODEL_URL = ("https://raw.githubusercontent.com/opencv/opencv_3rdparty/"
+                  "dnn_samples_face_detector_20180220_uint8/opencv_face_detector_uint8.pb")
+FACE_MODEL_SHA1 = "4f2fdf6f231d759d7bbdb94353c5a68690f3d2ae"
+FACE_SCORE_THRESHOLD = 0.5
+
+def ensure_face_model():
+    """Fetch/verify the face detector weights. Call once from the main process, not from workers."""
+    return _fetch_model(FACE_MODEL_URL, FACE_MODEL_PATH, FACE_MODEL_SHA1, "sha1")
+
 _face_cascade = None
 def get_face_cascade():
     global _face_cascade
@@ -101,90 +242,177 @@ def get_face_cascade():
         _face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_frontalface_default.xml")
     return _face_cascade
 
-def detect_faces(cv_img):
+_face_detector = None
+def get_face_detector():
+    """Lazily load the DNN face detector; return None if its files are missing or unloadable. Never downloads."""
+    global _face_detector
+    if _face_detector is None:
+        if not (os.path.exists(FACE_MODEL_PATH) and os.path.exists(FACE_CONFIG_PATH)):
+            return None
+        try:
+            _face_detector = cv2.dnn.readNetFromTensorflow(FACE_MODEL_PATH, FACE_CONFIG_PATH)
+        except cv2.error:
+            return None
+    return _face_detector
+
+def detect_faces(cv_img, view=None):
     if cv_img is None or cv_img.size == 0:
         return []
-    gray = cv2.cvtColor(cv_img, cv2.COLOR_BGR2GRAY)
-    faces = get_face_cascade().detectMultiScale(gray, scaleFactor=1.1, minNeighbors=4, minSize=(40, 40))
-    return [{"type": "FACE", "box": [int(x), int(y), int(w), int(h)]} for (x, y, w, h) in faces]
+    gray, scale = view if view is not None else prepare_views(cv_img)
+    net = get_face_detector()
+    if net is not None:
+        # SSD priors follow the input size, so run on the whole view rather than
+        # squashing the page to 300x300 (small ID-photo faces would vanish)
+        h, w = gray.shape[:2]
+        net.setInput(cv2.dnn.blobFromImage(cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR), 1.0, (w, h), (104.0, 177.0, 123.0)))
+        dets = net.forward()[0, 0]
+        dets = dets[dets[:, 2] >= FACE_SCORE_THRESHOLD]
+        faces = np.clip(dets[:, 3:7], 0.0, 1.0) * [w, h, w, h]
+        return [{"type": "FACE", "box": _to_full_res(x1, y1, x2 - x1, y2 - y1, scale)} for (x1, y1, x2, y2) in faces]
+    min_side = max(24, int(40 * scale))
+    faces = get_face_cascade().detectMultiScale(gray, scaleFactor=1.1, minNeighbors=4, minSize=(min_side, min_side))
+    return [{"type": "FACE", "box": _to_full_res(x, y, w, h, scale)} for (x, y, w, h) in faces]
 
 
 # ---------- Signature regions ----------
-def find_signature_regions(cv_img, ocr_lines):
+_SIG_DILATE_KERNEL = np.ones((3, 3), np.uint8)
+
+def find_signature_regions(cv_img, ocr_lines, view=None):
     if cv_img is None or cv_img.size == 0:
         return []
-    h, w = cv_img.shape[:2]
-    gray = cv2.cvtColor(cv_img, cv2.COLOR_BGR2GRAY)
-    blur = cv2.GaussianBlur(gray, (5, 5), 0)
-    edges = cv2.Canny(blur, 50, 150)
-    dil = cv2.dilate(edges, np.ones((3, 3), np.uint8), iterations=1)
+    hint_lines = [l for l in ocr_lines if any(k in l.get("text", "").lower() for k in SIGNATURE_HINTS)]
+    if not hint_lines:
+        return []
+    gray, scale = view if view is not None else prepare_views(cv_img)
+    h, w = gray.shape[:2]
+    min_area, max_area = 500 * scale * scale, 60000 * scale * scale
+    # Keep the blur -> Canny -> dilate chain in a UMat so OpenCV can run it via OpenCL
+    ublur = cv2.GaussianBlur(cv2.UMat(gray), (5, 5), 0)
+    uedges = cv2.Canny(ublur, 50, 150)
+    udil = cv2.dilate(uedges, _SIG_DILATE_KERNEL, iterations=1)
     regions = []
-    for line in ocr_lines:
-        text = line.get("text", "").lower()
-        if any(k in text for k in SIGNATURE_HINTS):
-            x, y, w0, h0 = line["box"]
-            y1 = min(h, y + h0 + int(3 * h0))
-            x0 = max(0, x - int(0.2 * w0)); x1 = min(w, x + w0 + int(0.2 * w0))
-            roi = dil[y:y1, x0:x1]
-            cnts, _ = cv2.findContours(roi, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-            for c in cnts:
-                area = cv2.contourArea(c)
-                if 500 < area < 60000:
-                    rx, ry, rw, rh = cv2.boundingRect(c)
-                    aspect = rw / max(1, rh)
-                    if aspect > 2.5:
-                        regions.append({"type": "SIGNATURE", "box": [int(x0 + rx), int(y + ry), int(rw), int(rh)]})
+    for line in hint_lines:
+        x, y, w0, h0 = (int(v * scale) for v in line["box"])
+        y1 = min(h, y + h0 + int(3 * h0))
+        x0 = max(0, x - int(0.2 * w0)); x1 = min(w, x + w0 + int(0.2 * w0))
+        if y >= y1 or x0 >= x1:
+            continue
+        roi = cv2.UMat(udil, (y, y1), (x0, x1)).get()
+        cnts, _ = cv2.findContours(roi, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        for c in cnts:
+            area = cv2.contourArea(c)
+            if min_area < area < max_area:
+                rx, ry, rw, rh = cv2.boundingRect(c)
+                aspect = rw / max(1, rh)
+                if aspect > 2.5:
+                    regions.append({"type": "SIGNATURE", "box": _to_full_res(x0 + rx, y + ry, rw, rh, scale)})
     return regions
 
 
 # ---------- QR code detection ----------
-def detect_qr_regions(cv_img):
+# WeChat's CNN QR detector (opencv-contrib) is used when its models are present;
+# otherwise we fall back to pyzbar. The four model files are fetched by
+# ensure_qr_models() from the WeChatCV/opencv_3rdparty commit OpenCV's own build
+# pins, and checked against the MD5s it pins (opencv_contrib/modules/wechat_qrcode/CMakeLists.txt).
+WECHAT_QR_MODEL_DIR = os.path.join(MODELS_DIR, "wechat_qrcode")
+WECHAT_QR_URL = "https://raw.githubusercontent.com/WeChatCV/opencv_3rdparty/a8b69ccc738421293254aec5ddb38bd523503252/"
+WECHAT_QR_MODELS = {  # constructor order: detector graph/weights, then super-resolution graph/weights
+    "detect.prototxt": "6fb4976b32695f9f5c6305c19f12537d",
+    "detect.caffemodel": "238e2b2d6f3c18d6c3a30de0c31e23cf",
+    "sr.prototxt": "69db99927a70df953b471daaba03fbef",
+    "sr.caffemodel": "cbfcd60361a73beb8c583eea7e8e6664",
+}
+
+def ensure_qr_models():
+    """Fetch/verify the WeChat QR models. Call once from the main process, not from workers."""
+    if not hasattr(cv2, "wechat_qrcode_WeChatQRCode"):
+        return False
+    return all(_fetch_model(WECHAT_QR_URL + name, os.path.join(WECHAT_QR_MODEL_DIR, name), md5, "md5")
+               for name, md5 in WECHAT_QR_MODELS.items())
+
+_qr_detector = None
+def get_qr_detector():
+    """Lazily create the WeChat QR detector; return None if opencv-contrib or the models are missing. Never downloads."""
+    global _qr_detector
+    if _qr_detector is None:
+        paths = [os.path.join(WECHAT_QR_MODEL_DIR, name) for name in WECHAT_QR_MODELS]
+        if not hasattr(cv2, "wechat_qrcode_WeChatQRCode") or not all(os.path.exists(p) for p in paths):
+            return None
+        try:
+            _qr_detector = cv2.wechat_qrcode_WeChatQRCode(*paths)
+        except cv2.error:
+            return None
+    return _qr_detector
+
+def detect_qr_regions(cv_img, view=None):
     results = []
     if cv_img is None or cv_img.size == 0:
         return results
-    detections = decode(cv_img)
+    gray, scale = view if view is not None else prepare_views(cv_img)
+    detector = get_qr_detector()
+    if detector is not None:
+        texts, points = detector.detectAndDecode(gray)
+        for text, pts in zip(texts, points):
+            x, y, w, h = cv2.boundingRect(np.asarray(pts, dtype=np.float32))
+            results.append({"type": "QRCODE", "box": _to_full_res(x, y, w, h, scale), "matched": text})
+        return results
+    detections = decode(gray)
     for d in detections:
         (x, y, w, h) = d.rect
         results.append({
             "type": "QRCODE",
-            "box": [x, y, w, h],
+            "box": _to_full_res(x, y, w, h, scale),
             "matched": d.data.decode("utf-8", errors="ignore")
         })
     return results
 
 
 # ---------- NER ----------
+NER_LABELS = ("PERSON", "GPE", "ORG")
+
 def ner_findings(text: str, ocr_lines, enable_ner: bool):
+    return ner_findings_batch([text], [ocr_lines], enable_ner)[0]
+
+def ner_findings_batch(page_texts, page_lines, enable_ner: bool, batch_size: int = 32):
+    """
+    NER for many pages in one nlp.pipe pass. Returns one list of boxes per page.
+    Blank pages are skipped without touching spaCy.
+    """
+    results = [[] for _ in page_texts]
+    todo = [i for i, t in enumerate(page_texts) if t and t.strip()]
+    if not todo:
+        return results
     nlp = get_nlp(enable_ner)
-    if not nlp or not text:
-        return []
-    doc = nlp(text)
-    ents = []
-    for e in doc.ents:
-        if e.label_ in ("PERSON", "GPE", "ORG"):
-            ents.append({"label": e.label_, "matched": e.text})
-    return align_text_findings_to_boxes(ents, ocr_lines)
+    if not nlp:
+        return results
+    docs = nlp.pipe((page_texts[i] for i in todo), batch_size=batch_size)
+    for i, doc in zip(todo, docs):
+        ents = [{"label": e.label_, "span": [e.start_char, e.end_char], "matched": e.text}
+                for e in doc.ents if e.label_ in NER_LABELS]
+        results[i] = locate_findings_by_offset(ents, page_lines[i])
+    return results
 
 
 # ---------- Unified pipeline ----------
 def detect_sensitive_regions(cv_img, ocr_lines, full_text, enable_ner: bool = False):
     results = []
+    view = prepare_views(cv_img)
 
     # Regex-based entities
     regex_findings = regex_entities(full_text)
-    results.extend(align_text_findings_to_boxes(regex_findings, ocr_lines))
+    results.extend(locate_findings_by_offset(regex_findings, ocr_lines))
 
     # Named entities (spaCy)
     if enable_ner:
         results.extend(ner_findings(full_text, ocr_lines, enable_ner))
 
     # Faces
-    results.extend(detect_faces(cv_img))
+    results.extend(detect_faces(cv_img, view))
 
     # Signatures
-    results.extend(find_signature_regions(cv_img, ocr_lines))
+    results.extend(find_signature_regions(cv_img, ocr_lines, view))
 
     # QR Codes
-    results.extend(detect_qr_regions(cv_img))
+    results.extend(detect_qr_regions(cv_img, view))
 
     return results
@@ -1,5 +1,7 @@
 # utils/ocr_utils.py
 import io
+import os
+import tempfile
 import numpy as np
 from PIL import Image
 import cv2
@@ -18,21 +20,156 @@ try:
 except Exception:
     _PYTESS_AVAILABLE = False
 
-def get_ocr_reader(use_easyocr=True):
+try:
+    import onnxruntime as ort
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+    _ORT_AVAILABLE = True
+except Exception:
+    _ORT_AVAILABLE = False
+
+def get_ocr_reader(use_easyocr=True, langs=("en",), onnx_int8=False):
     """
     Returns an EasyOCR reader if available and user requested; otherwise None (we use pytesseract fallback).
+    English-only uses the smaller english_g2 recognizer; other language sets use EasyOCR's default.
+    With onnx_int8, the recognizer is swapped for an int8 ONNX Runtime session when possible.
     """
     if use_easyocr and _EASYOCR_AVAILABLE:
-        # languages: english + hindi default; change if required
-        return easyocr.Reader(['en','hi'], gpu=False)
+        langs = list(langs) or ["en"]
+        kwargs = {"recog_network": "english_g2"} if langs == ["en"] else {}
+        use_onnx = onnx_int8 and _ORT_AVAILABLE
+        # EasyOCR's own torch int8 quantization can't be exported to ONNX, so skip it on the ONNX path
+        reader = easyocr.Reader(langs, gpu=False, quantize=not use_onnx, **kwargs)
+        # the cached graph is only valid for this recognizer network, language set and EasyOCR release
+        tag = "_".join([kwargs.get("recog_network", "standard"), *langs, f"easyocr{getattr(easyocr, '__version__', '')}"])
+        if use_onnx and not _attach_onnx_recognizer(reader, tag):
+            # export failed: fall back to EasyOCR's usual torch-quantized reader
+            reader = easyocr.Reader(langs, gpu=False, **kwargs)
+        return reader
     return None
 
+class _OnnxRecognizer:
+    """Stands in for reader.recognizer: EasyOCR calls .eval() and model(image, text)."""
+    def __init__(self, model_path):
+        opts = ort.SessionOptions()
+        opts.intra_op_num_threads = os.cpu_count() or 1
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(model_path, opts, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def eval(self):
+        return self
+
+    def __call__(self, image, text=None):
+        import torch
+        preds = self.session.run(None, {self.input_name: image.cpu().numpy()})[0]
+        return torch.from_numpy(preds)
+
+def _attach_onnx_recognizer(reader, tag):
+    """
+    Export the reader's CRNN to ONNX, quantize it to int8 (cached next to
+    EasyOCR's models, keyed by `tag`) and swap it in. Returns False if anything fails.
+    """
+    import copy
+    import inspect
+    import torch
+
+    class _ImageOnly(torch.nn.Module):
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, image):
+            return self.model(image, None)
+
+    class _MeanOverHeight(torch.nn.Module):
+        # Same as AdaptiveAvgPool2d((None, 1)) on [b, w, c, h], which ONNX can't export with a dynamic width
+        def forward(self, x):
+            return x.mean(dim=3, keepdim=True)
+
+    onnx_dir = os.path.join(reader.model_storage_directory, "onnx")
+    int8_path = os.path.join(onnx_dir, f"{tag}_crnn.int8.onnx")
+    if os.path.exists(int8_path):
+        try:
+            reader.recognizer = _OnnxRecognizer(int8_path)
+            return True
+        except Exception:
+            os.remove(int8_path)  # unreadable cache entry: rebuild it below
+    tmp_paths = []
+    try:
+        os.makedirs(onnx_dir, exist_ok=True)
+        for _ in range(2):
+            fd, path = tempfile.mkstemp(suffix=".onnx", dir=onnx_dir)
+            os.close(fd)
+            tmp_paths.append(path)
+        fp32_tmp, int8_tmp = tmp_paths
+        model = copy.deepcopy(getattr(reader.recognizer, "module", reader.recognizer)).eval()
+        if isinstance(getattr(model, "AdaptiveAvgPool", None), torch.nn.AdaptiveAvgPool2d):
+            model.AdaptiveAvgPool = _MeanOverHeight()
+        dummy = torch.zeros(1, 1, getattr(reader, "imgH", 64), 256)
+        # newer torch defaults to the dynamo exporter (needs onnxscript); use the TorchScript one
+        extra = {"dynamo": False} if "dynamo" in inspect.signature(torch.onnx.export).parameters else {}
+        torch.onnx.export(
+            _ImageOnly(model), dummy, fp32_tmp,
+            input_names=["image"], output_names=["preds"],
+            dynamic_axes={"image": {0: "batch", 3: "width"}, "preds": {0: "batch", 1: "steps"}},
+            opset_version=13, **extra,
+        )
+        quantize_dynamic(fp32_tmp, int8_tmp, weight_type=QuantType.QInt8)
+        recognizer = _OnnxRecognizer(int8_tmp)
+        # only a graph that loads gets the final name, so an interrupted export never leaves a bad cache entry
+        os.replace(int8_tmp, int8_path)
+        reader.recognizer = recognizer
+        return True
+    except Exception:
+        return False
+    finally:
+        for path in tmp_paths:
+            if os.path.exists(path):
+                os.remove(path)
+
 def pil_to_cv(pil_img):
     return cv2.cvtColor(np.array(pil_img), cv2.COLOR_RGB2BGR)
 
 def cv_to_pil(cv_img):
     return Image.fromarray(cv2.cvtColor(cv_img, cv2.COLOR_BGR2RGB))
 
+def _easyocr_lines(res):
+    """Convert EasyOCR (bbox, text, conf) results to our line dicts."""
+    out = []
+    for bbox, text, conf in res:
+        xs = [int(p[0]) for p in bbox]
+        ys = [int(p[1]) for p in bbox]
+        x0, y0, x1, y1 = min(xs), min(ys), max(xs), max(ys)
+        out.append({"text": text, "box":[x0,y0,x1-x0,y1-y0], "conf": float(conf)})
+    return out
+
+def ocr_batch(pil_list, reader=None, pages_per_batch=4, recog_batch_size=1):
+    """
+    OCR several pages at once. Returns one list of lines per input image, in order.
+    Same-sized pages (the usual case for PDFs) go through EasyOCR's batched
+    detector together, `pages_per_batch` at a time; odd-sized ones are processed
+    on their own. `recog_batch_size` is EasyOCR's recognizer batch size, kept at
+    readtext's default of 1 so batched pages read the same text as single ones.
+    """
+    results = [None] * len(pil_list)
+    if reader is None:
+        for i, pil in enumerate(pil_list):
+            results[i] = ocr_with_boxes(pil, None)
+        return results
+    groups = {}
+    for i, pil in enumerate(pil_list):
+        groups.setdefault(pil.size, []).append(i)
+    for idxs in groups.values():
+        for s in range(0, len(idxs), pages_per_batch):
+            chunk = idxs[s:s + pages_per_batch]
+            if len(chunk) == 1:
+                results[chunk[0]] = ocr_with_boxes(pil_list[chunk[0]], reader)
+                continue
+            arrs = [np.array(pil_list[i]) for i in chunk]
+            for i, res in zip(chunk, reader.readtext_batched(arrs, batch_size=recog_batch_size)):
+                results[i] = _easyocr_lines(res)
+    return results
+
 def ocr_with_boxes(pil_img, reader=None):
     """
     Returns list of lines: {"text": str, "box": [x,y,w,h], "conf": float}
@@ -41,13 +178,7 @@ def ocr_with_boxes(pil_img, reader=None):
     if reader is not None:
         # EasyOCR expects numpy array
         arr = np.array(pil_img)
-        res = reader.readtext(arr)
-        for bbox, text, conf in res:
-            xs = [int(p[0]) for p in bbox]
-            ys = [int(p[1]) for p in bbox]
-            x0, y0, x1, y1 = min(xs), min(ys), max(xs), max(ys)
-            out.append({"text": text, "box":[x0,y0,x1-x0,y1-y0], "conf": float(conf)})
-        return out
+        return _easyocr_lines(reader.readtext(arr))
     else:
         # pytesseract fallback
         if not _PYTESS_AVAILABLE:
@@ -0,0 +1,59 @@
+# utils/parallel_utils.py
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from .detect_utils import (
+    regex_entities,
+    locate_findings_by_offset,
+    detect_faces,
+    find_signature_regions,
+    detect_qr_regions,
+    ner_findings,
+    prepare_views,
+    get_face_cascade,
+    get_face_detector,
+    get_qr_detector,
+)
+
+def _worker_init():
+    """Load the face and QR models once per worker process (NER runs batched in the parent)."""
+    if get_face_detector() is None:
+        get_face_cascade()
+    get_qr_detector()
+
+def detect_page(cv_img, lines, enable_ner=True, enable_faces=True, enable_signatures=True):
+    """
+    Run every detector on one OCR'd page and return the merged detections.
+    Module-level so it can be submitted to the process pool.
+    """
+    view = prepare_views(cv_img)
+    face_boxes = detect_faces(cv_img, view) if enable_faces else []
+    qr_boxes = detect_qr_regions(cv_img, view)  # QR detection included always
+    if not lines:
+        # blank/scanned-image page: nothing for the text-based detectors to work on
+        return face_boxes + qr_boxes
+
+    full_text = "\n".join([l["text"] for l in lines])
+
+    text_findings = regex_entities(full_text)
+    text_boxes = locate_findings_by_offset(text_findings, lines)
+
+    ner_boxes = ner_findings(full_text, lines, enable_ner)
+
+    sig_boxes = find_signature_regions(cv_img, lines, view) if enable_signatures else []
+
+    return text_boxes + ner_boxes + face_boxes + sig_boxes + qr_boxes
+
+def make_page_pool(max_workers=None):
+    """
+    Process pool for detect_page. Uses "spawn" so workers don't inherit the
+    parent's torch/OpenMP threads.
+    """
+    if max_workers is None:
+        max_workers = max(1, (os.cpu_count() or 2) // 2)
+    return ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_worker_init,
+    )
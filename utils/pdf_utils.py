@@ -1,34 +1,47 @@
 # utils/pdf_utils.py
 import io
-from functools import lru_cache
+import os
 from PIL import Image
+import cv2
 import fitz  # PyMuPDF
 
-@lru_cache(maxsize=64)
-def _pdf_page_count(pdf_bytes_hash: int):
-    doc = fitz.open(stream=bytes.fromhex(hex(pdf_bytes_hash)[2:]), filetype="pdf")
-    n = len(doc)
+def _page_zoom(page, dpi, max_px):
+    """Zoom factor that renders the page at `dpi`, capped so the longest side is <= max_px."""
+    zoom = dpi / 72
+    longest = max(page.rect.width, page.rect.height) * zoom
+    return zoom * min(1.0, max_px / max(1.0, longest))
+
+def _render_pages(file_bytes: bytes, page_idxs, dpi: int, max_px: int):
+    """Render the given page indices to RGB PIL images. Module-level so it can run in a worker process."""
+    doc = fitz.open(stream=file_bytes, filetype="pdf")
+    pages = []
+    for i in page_idxs:
+        zoom = _page_zoom(doc[i], dpi, max_px)
+        pix = doc[i].get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+        pages.append(Image.frombytes("RGB", [pix.width, pix.height], pix.samples))
     doc.close()
-    return n
+    return pages
 
-def load_pages_from_pdf(file_bytes: bytes, dpi: int = 170, max_px: int = 1800):
+def load_pages_from_pdf(file_bytes: bytes, dpi: int = 170, max_px: int = 1800, executor=None, pages_per_task: int = 4):
     """
     Input: raw PDF bytes
-    Output: list of PIL.Image pages (RGB), resized for speed
+    Output: list of PIL.Image pages (RGB), rendered directly at the capped size
+    If a process executor is given, pages are rendered in parallel (PyMuPDF is
+    not thread-safe, so each worker opens its own document). The pages are split
+    into at most one contiguous range per worker, of at least `pages_per_task`
+    pages, so the PDF bytes are pickled once per worker rather than once per
+    small chunk, and never leave memory.
     """
     doc = fitz.open(stream=file_bytes, filetype="pdf")
-    pages = []
-    for i in range(len(doc)):
-        pix = doc[i].get_pixmap(dpi=dpi)
-        img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-        # downscale for speed if huge
-        w, h = img.size
-        scale = min(1.0, max_px / max(w, h))
-        if scale < 1.0:
-            img = img.resize((int(w * scale), int(h * scale)), Image.LANCZOS)
-        pages.append(img)
+    n = len(doc)
     doc.close()
-    return pages
+    if executor is None or n <= pages_per_task:
+        return _render_pages(file_bytes, range(n), dpi, max_px)
+    workers = getattr(executor, "_max_workers", None) or os.cpu_count() or 1
+    step = max(pages_per_task, -(-n // workers))
+    futures = [executor.submit(_render_pages, file_bytes, range(s, min(n, s + step)), dpi, max_px)
+               for s in range(0, n, step)]
+    return [img for fut in futures for img in fut.result()]
 
 def remove_pdf_metadata_bytes(pdf_bytes: bytes):
     """Remove PDF metadata and return cleaned bytes (snake_case API)."""
@@ -38,12 +51,28 @@ def remove_pdf_metadata_bytes(pdf_bytes: bytes):
     doc.close()
     return out
 
-def export_images_to_pdf(pil_images):
-    """Return BytesIO containing a single PDF composed from pil_images."""
+def export_images_to_pdf(cv_images, jpeg_quality: int = 75):
+    """
+    Return BytesIO containing a single PDF composed from BGR numpy pages.
+    `cv_images` may be any iterable (e.g. a generator); pages are JPEG-encoded
+    and written one at a time so only the current page needs to be in memory.
+    """
+    doc = fitz.open()
+    for pno, arr in enumerate(cv_images, start=1):
+        try:
+            ok, jpg = cv2.imencode(".jpg", arr, [cv2.IMWRITE_JPEG_QUALITY, jpeg_quality])
+        except cv2.error:
+            ok = False
+        if not ok:
+            # never drop a page silently: the PDF must line up with the redaction log
+            doc.close()
+            raise RuntimeError(f"Could not JPEG-encode page {pno} for the redacted PDF")
+        h, w = arr.shape[:2]
+        page = doc.new_page(width=w, height=h)
+        page.insert_image(page.rect, stream=jpg.tobytes())
     buf = io.BytesIO()
-    if not pil_images:
-        buf.seek(0)
-        return buf
-    pil_images[0].save(buf, format="PDF", save_all=True, append_images=pil_images[1:])
+    if len(doc):
+        doc.save(buf, garbage=3, deflate=True)
+    doc.close()
     buf.seek(0)
     return buf
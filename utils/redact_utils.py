@@ -1,20 +1,38 @@
 # utils/redact_utils.py
 import cv2
+import numpy as np
 from PIL import Image, ImageDraw, ImageFilter
-from .ocr_utils import cv_to_pil, pil_to_cv
+
+def boxes_to_array(detections):
+    """
+    Stack the 'box' of each detection into an (N, 4) int32 array of [x, y, w, h].
+    Missing boxes become zeros.
+    """
+    if not detections:
+        return np.zeros((0, 4), np.int32)
+    return np.array([det.get("box") or [0, 0, 0, 0] for det in detections], dtype=np.int32).reshape(-1, 4)
+
+def _expand_boxes(boxes, img_shape, pad_frac):
+    """
+    Expand (N, 4) [x, y, w, h] boxes by pad_frac of width/height, clipped to the image.
+    Returns (N, 4) [x0, y0, x1, y1].
+    """
+    H, W = img_shape[:2]
+    x, y, w, h = boxes.T
+    padx = (w * pad_frac).astype(np.int32)
+    pady = (h * pad_frac).astype(np.int32)
+    return np.stack([
+        np.maximum(0, x - padx),
+        np.maximum(0, y - pady),
+        np.minimum(W, x + w + padx),
+        np.minimum(H, y + h + pady),
+    ], axis=1)
 
 def _rect_expand(box, img_shape, pad_frac=0.05):
     """
     Slightly expand a bounding box by pad_frac of width/height
     """
-    x, y, w, h = box
-    H, W = img_shape[:2]
-    padx = int(w * pad_frac)
-    pady = int(h * pad_frac)
-    x0 = max(0, x - padx)
-    y0 = max(0, y - pady)
-    x1 = min(W, x + w + padx)
-    y1 = min(H, y + h + pady)
+    x0, y0, x1, y1 = _expand_boxes(np.array([box], np.int32), img_shape, pad_frac)[0].tolist()
     return [x0, y0, x1 - x0, y1 - y0]
 
 def apply_redactions_cv(cv_img, detections, mode="blur"):
@@ -27,35 +45,26 @@ def apply_redactions_cv(cv_img, detections, mode="blur"):
     - mode: 'blur' or 'black'
     
     Returns:
-    - PIL.Image (RGB) with redactions applied
+    - BGR numpy array with redactions applied
     """
     out = cv_img.copy()
-    H, W = out.shape[:2]
-
-    for det in detections:
-        box = det.get("box", [0, 0, 0, 0])
-        if not box or box[2] == 0 or box[3] == 0:
-            continue
-
-        # expand slightly for nicer coverage
-        x, y, w, h = box
-        x0 = max(0, x - int(0.03 * w))
-        y0 = max(0, y - int(0.03 * h))
-        x1 = min(W, x + w + int(0.03 * w))
-        y1 = min(H, y + h + int(0.03 * h))
 
+    boxes = boxes_to_array(detections)
+    boxes = boxes[(boxes[:, 2] != 0) & (boxes[:, 3] != 0)]
+    # expand slightly for nicer coverage
+    for x0, y0, x1, y1 in _expand_boxes(boxes, out.shape, 0.03).tolist():
         if mode == "black":
             cv2.rectangle(out, (x0, y0), (x1, y1), (0, 0, 0), thickness=-1)
         else:
             roi = out[y0:y1, x0:x1]
             if roi.size == 0:
                 continue
-            # dynamic blur kernel
-            k = max(15, (max(1, (x1 - x0) // 10) // 2) * 2 + 1)
-            blurred = cv2.GaussianBlur(roi, (k, k), 0)
-            out[y0:y1, x0:x1] = blurred
+            # pixelate: shrink to ~1/16 then blow back up (O(1) per pixel, non-invertible)
+            rw, rh = x1 - x0, y1 - y0
+            small = cv2.resize(roi, (max(1, rw // 16), max(1, rh // 16)), interpolation=cv2.INTER_LINEAR)
+            out[y0:y1, x0:x1] = cv2.resize(small, (rw, rh), interpolation=cv2.INTER_NEAREST)
 
-    return cv_to_pil(out)
+    return out
 
 
 def apply_redactions_pil(pil_img, detections, mode="blur"):